@@ -0,0 +1,137 @@
+# _kernels.py
+"""
+Compiled kernels for the threshold sweep (optional numba / jax
+dependencies).
+
+numba and jax are only imported, and the kernels only built, the first
+time a backend asks for them, so importing env stays cheap when the
+default backend is used. HAVE_NUMBA and HAVE_JAX only check that the
+package is installed.
+"""
+import importlib.util
+from functools import lru_cache
+
+import numpy as np
+
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+HAVE_JAX = importlib.util.find_spec("jax") is not None
+
+
+@lru_cache(maxsize=None)
+def load_sweep_kernel():
+    """Import numba and return the compiled sweep_kernel."""
+    from numba import njit, prange
+
+    # fastmath without nnan/ninf: t_adjust_break is +inf for borrowers
+    # who adjust for free
+    @njit(parallel=True,
+          fastmath={"nsz", "arcp", "contract", "afn", "reassoc"})
+    def sweep_kernel(z, k, t_adjust_break, is_low_cost, is_good, t_grid):
+        """
+        Streamed (T, N) threshold sweep without materializing 2D arrays.
+
+        Each threshold is handled by one thread, which walks over all
+        borrowers and accumulates into its own slot of the output arrays.
+        Returns (n_acc_G, n_acc_B, H, acc_L, acc_H, cost_L, cost_H),
+        each of shape (len(t_grid),).
+        """
+        T = t_grid.shape[0]
+        N = z.shape[0]
+
+        n_acc_G = np.zeros(T, dtype=np.int64)
+        n_acc_B = np.zeros(T, dtype=np.int64)
+        H = np.zeros(T, dtype=np.int64)
+        acc_L = np.zeros(T, dtype=np.int64)
+        acc_H = np.zeros(T, dtype=np.int64)
+        cost_L = np.zeros(T)
+        cost_H = np.zeros(T)
+
+        for ti in prange(T):
+            t = t_grid[ti]
+            g_acc = 0
+            b_acc = 0
+            harm = 0
+            l_acc = 0
+            h_acc = 0
+            l_cost = 0.0
+            h_cost = 0.0
+
+            for i in range(N):
+                # Accepted up to the cached break, adjusting if z < t
+                accepted = t <= t_adjust_break[i]
+                a = t - z[i] if accepted and z[i] < t else 0.0
+
+                if accepted:
+                    if is_good[i]:
+                        g_acc += 1
+                    else:
+                        b_acc += 1
+                elif is_good[i]:
+                    harm += 1
+
+                if is_low_cost[i]:
+                    if accepted:
+                        l_acc += 1
+                    l_cost += k[i] * a * a
+                else:
+                    if accepted:
+                        h_acc += 1
+                    h_cost += k[i] * a * a
+
+            n_acc_G[ti] = g_acc
+            n_acc_B[ti] = b_acc
+            H[ti] = harm
+            acc_L[ti] = l_acc
+            acc_H[ti] = h_acc
+            cost_L[ti] = l_cost
+            cost_H[ti] = h_cost
+
+        return n_acc_G, n_acc_B, H, acc_L, acc_H, cost_L, cost_H
+
+    return sweep_kernel
+
+
+@lru_cache(maxsize=None)
+def load_jax_sweep():
+    """Import jax and return the jitted jax_sweep."""
+    import jax
+    import jax.numpy as jnp
+
+    def _threshold_sums_jax(z, k, t_adjust_break, is_low_cost, is_good, t):
+        """Per-threshold sums for a single t (vmapped over the t-grid)."""
+        needs_adjust = (z < t) & (t <= t_adjust_break)
+        a = (t - z) * needs_adjust
+        accepted = (z >= t) | needs_adjust
+        cost = k * a * a
+
+        n_acc_G = jnp.sum(accepted & is_good)
+        n_acc_B = jnp.sum(accepted & ~is_good)
+        H = jnp.sum(~accepted & is_good)
+        acc_L = jnp.sum(accepted & is_low_cost)
+        acc_H = jnp.sum(accepted & ~is_low_cost)
+        cost_L = jnp.sum(jnp.where(is_low_cost, cost, 0.0))
+        cost_H = jnp.sum(jnp.where(is_low_cost, 0.0, cost))
+
+        return n_acc_G, n_acc_B, H, acc_L, acc_H, cost_L, cost_H
+
+    @jax.jit
+    def jax_sweep(z, k, t_adjust_break, is_low_cost, is_good, t_grid,
+                  lambda_grid, pi_G, pi_B):
+        """
+        Whole λ × t sweep as one jitted program (runs on GPU/TPU when
+        available).
+
+        Returns (t_idx, sums): the maximizing index into t_grid for each
+        λ (first maximizer on ties), and the per-threshold sums in the
+        same layout as sweep_kernel.
+        """
+        sums = jax.vmap(
+            _threshold_sums_jax, in_axes=(None, None, None, None, None, 0)
+        )(z, k, t_adjust_break, is_low_cost, is_good, t_grid)
+
+        n_acc_G, n_acc_B, H = sums[0], sums[1], sums[2]
+        Pi = pi_G * n_acc_G + pi_B * n_acc_B
+        obj = Pi[None, :] - lambda_grid[:, None] * H[None, :]
+        return jnp.argmax(obj, axis=1), sums
+
+    return jax_sweep
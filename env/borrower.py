@@ -1,10 +1,51 @@
 from dataclasses import dataclass
 
+import numpy as np
 
-@dataclass
+
+def best_response(z, k, b, h, is_good, t):
+    """
+    Best-response adjustment a given lender threshold t.
+
+    Works elementwise on numpy arrays (one entry per borrower) as well
+    as on scalars. A borrower below the threshold adjusts by exactly
+    t - z if that is at least as good as not adjusting.
+    """
+    # Amount needed to just reach the threshold (0 if already above)
+    delta = np.maximum(t - z, 0.0)
+
+    # Utility if adjust
+    U_adjust = b - k * delta * delta
+
+    # Utility if not adjust
+    U_no = np.where(is_good, -h, 0.0)
+
+    # Adjust only if it is at least as good as not adjusting
+    adjust = (delta > 0) & (U_adjust >= U_no)
+    return np.where(adjust, delta, 0.0)
+
+
+def adjustment_cost(k, a):
+    """Quadratic adjustment cost k * a^2 (elementwise)."""
+    return k * a * a
+
+
+def best_response_and_cost(z, k, b, h, is_good, t):
+    """
+    Best-response adjustment and its cost in one call: (a, k * a^2).
+    Same arguments as best_response.
+    """
+    a = best_response(z, k, b, h, is_good, t)
+    return a, adjustment_cost(k, a)
+
+
+@dataclass(slots=True, frozen=True)
 class Borrower:
     """
     Borrower agent in the regulated strategic lending model.
+
+    A read-only view of one borrower; the environment stores the
+    population as arrays.
     """
     z: float
     k: float
@@ -22,27 +63,17 @@ class Borrower:
         """
         Compute best-response adjustment a_i given lender threshold t.
         """
-        # Already above threshold: no need to adjust
-        if self.z >= t:
-            return 0.0
+        return float(best_response(self.z, self.k, self.b, self.h,
+                                   self.is_good, t))
 
-        # Amount needed to just reach the threshold
-        delta = t - self.z
-        if delta <= 0:
-            return 0.0  # numerical safety
-
-        # Utility if adjust
-        U_adjust = self.b - self.k * (delta ** 2)
-
-        # Utility if not adjust
-        U_no = -self.h if self.is_good else 0.0
-
-        # Adjust only if it is at least as good as not adjusting
-        if U_adjust >= U_no:
-            return delta
-        else:
-            return 0.0
+    def best_response_and_cost(self, t: float) -> tuple[float, float]:
+        """
+        Best-response adjustment given threshold t and its cost (a, k a^2).
+        """
+        a, cost = best_response_and_cost(self.z, self.k, self.b, self.h,
+                                         self.is_good, t)
+        return float(a), float(cost)
 
     def adjustment_cost(self, a: float) -> float:
         """Quadratic adjustment cost k * a^2."""
-        return self.k * (a ** 2)
\ No newline at end of file
+        return adjustment_cost(self.k, a)
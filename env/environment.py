@@ -1,12 +1,16 @@
 # environment.py
 import numpy as np
 from .borrower import Borrower
+from ._kernels import HAVE_JAX, HAVE_NUMBA, load_jax_sweep, load_sweep_kernel
+
+# Backends for the threshold sweeps (see precompute_threshold_curves)
+BACKENDS = ("tables", "numpy", "numba", "jax")
 
 
 class StrategicLendingEnv:
     """
     Minimal strategic lending environment with:
-    - Borrower agents (Borrower objects)
+    - Borrower population stored as aligned arrays (z, k, is_low_cost)
     - Lender (threshold t on reported scores s_i = z_i + a_i)
     - Regulator (penalty λ on good-but-denied borrowers)
     """
@@ -50,8 +54,32 @@ class StrategicLendingEnv:
         # RNG
         self.rng = np.random.default_rng(seed)
 
-        # List of Borrower agents
-        self.borrowers = []
+        # Borrower population (Struct-of-Arrays, one entry per borrower).
+        # Buffers are allocated once and refilled in place on every reset.
+        # z and k are float32: the statistics are counts and rates at 1/N
+        # resolution, and halving the width doubles throughput in the
+        # threshold sweeps. Sums are still accumulated in float64.
+        self.z = np.empty(N, np.float32)        # true creditworthiness
+        self.k = np.empty(N, np.float32)        # adjustment cost parameter
+        self.is_low_cost = np.empty(N, bool)    # True = low-cost group
+        self.is_good = np.empty(N, bool)        # creditworthy (z >= theta)
+        self.U_no = np.empty(N, np.float32)     # utility if not adjusting
+        self.t_adjust_break = np.empty(N, np.float32)  # accepted iff t <= this
+        self.group = np.empty(N, np.intp)       # group id: 1 = low, 0 = high
+        self.group_n = np.zeros(2, np.intp)     # group sizes by id
+        self.n_L = 0                            # size of low-cost group
+        self.n_H = 0                            # size of high-cost group
+        self._u = np.empty(N)                   # float64 scratch for draws
+
+        # Borrowers are stored sorted by (group, z). Each (group id,
+        # is_good) stratum is then a contiguous slice, within which
+        # t_adjust_break = z + const is sorted too.
+        self._strata = {}
+
+        # Prefix sums of z and z^2 in storage order (float64), so sums
+        # over any contiguous run of borrowers are O(1) lookups
+        self._cum_z = np.zeros(N + 1)
+        self._cum_z2 = np.zeros(N + 1)
 
         # Initialise population
         self.reset_population()
@@ -59,30 +87,153 @@ class StrategicLendingEnv:
     def reset_population(self, seed=None):
         """
         Generate a new borrower population (can be called to resample).
+
+        The draws are written into the existing population arrays, so
+        references to env.z etc. see the new population. Borrowers are
+        ordered high-cost group first, then low-cost, each by z.
         """
         if seed is not None:
             self.rng = np.random.default_rng(seed)
 
-        self.borrowers = []
-
-        # True creditworthiness
-        z_vals = self.rng.normal(self.z_mean, self.z_std, size=self.N)
+        # True creditworthiness (drawn and scaled in float64)
+        self.rng.standard_normal(out=self._u)
+        self._u *= self.z_std
+        self._u += self.z_mean
+        np.copyto(self.z, self._u, casting="same_kind")
 
         # Group labels: True = low-cost, False = high-cost
-        is_low_cost = self.rng.uniform(size=self.N) < self.p_L
-
-        # Create Borrower objects
-        for z, low_cost in zip(z_vals, is_low_cost):
-            k = self.k_L if low_cost else self.k_H
-            borrower = Borrower(
-                z=z,
-                k=k,
-                theta=self.theta,
-                b=self.b,
-                h=self.h,
-                is_low_cost=low_cost,
+        self.rng.random(out=self._u)
+        np.less(self._u, self.p_L, out=self.is_low_cost)
+
+        # Stratify by group, then sort by z within each group
+        order = np.lexsort((self.z, self.is_low_cost))
+        self.z[:] = self.z[order]
+        self.is_low_cost[:] = self.is_low_cost[order]
+
+        np.cumsum(self.z, dtype=np.float64, out=self._cum_z[1:])
+        np.cumsum(np.square(self.z, dtype=np.float64), out=self._cum_z2[1:])
+
+        # Group sizes do not depend on the threshold
+        np.copyto(self.group, self.is_low_cost)
+        self.group_n = np.bincount(self.group, minlength=2)
+        self.n_H, self.n_L = self.group_n
+
+        self._build_population()
+
+    def _build_population(self):
+        """
+        Derive the parameter-dependent borrower arrays from the drawn
+        z and group labels.
+        """
+        # theta, b, h are shared scalars
+        self.k.fill(self.k_H)
+        np.copyto(self.k, self.k_L, where=self.is_low_cost)
+        np.greater_equal(self.z, self.theta, out=self.is_good)
+
+        # Utility if not adjusting: -h for good borrowers, 0 for bad
+        self.U_no.fill(0.0)
+        np.copyto(self.U_no, -self.h, where=self.is_good)
+
+        # Threshold above which adjusting no longer pays:
+        # z + sqrt((b - U_no) / k), i.e. where b - k (t - z)^2 = U_no.
+        # Since it is >= z, borrower i is accepted iff t <= t_adjust_break.
+        # With k == 0 adjusting is free: the break is +inf if it pays at
+        # all (b >= U_no) and z otherwise.
+        tb = self.t_adjust_break
+        np.subtract(self.b, self.U_no, out=tb)
+        free = self.k == 0
+        always = free & (tb >= 0)
+        np.maximum(tb, 0.0, out=tb)
+        np.divide(tb, self.k, out=tb, where=~free)
+        np.sqrt(tb, out=tb)
+        tb += self.z
+        tb[always] = np.inf
+
+        # Good borrowers are the is_good tail of each group's slice. Count
+        # from is_good itself so the boundary uses the same float32
+        # comparison with theta as the rest of the model.
+        bounds = (0, self.n_H, self.N)
+        for g in (0, 1):
+            lo, hi = bounds[g], bounds[g + 1]
+            first_good = lo + np.count_nonzero(~self.is_good[lo:hi])
+            self._strata[g, False] = slice(lo, first_good)
+            self._strata[g, True] = slice(first_good, hi)
+
+    def set_params(self, **params):
+        """
+        Update model parameters in place, keeping the drawn population.
+
+        Only parameters that do not enter the random draws can be set
+        (theta, b, h, k_L, k_H, pi_G, pi_B); changing N, p_L, z_mean,
+        z_std or seed requires a new environment.
+        """
+        allowed = {"theta", "b", "h", "k_L", "k_H", "pi_G", "pi_B"}
+        unknown = set(params) - allowed
+        if unknown:
+            raise ValueError(
+                f"Cannot set {sorted(unknown)} without redrawing the population"
             )
-            self.borrowers.append(borrower)
+
+        for name, value in params.items():
+            setattr(self, name, value)
+        self._build_population()
+
+    def __len__(self):
+        return self.N
+
+    def __getitem__(self, i):
+        """
+        Borrower view of the i-th borrower, built on demand from the
+        population arrays. theta is rounded to float32 like z, so the
+        view's is_good matches the population's.
+        """
+        return Borrower(
+            z=float(self.z[i]),
+            k=float(self.k[i]),
+            theta=float(np.float32(self.theta)),
+            b=self.b,
+            h=self.h,
+            is_low_cost=bool(self.is_low_cost[i]),
+        )
+
+    def _respond(self, t):
+        """
+        Borrower best responses to threshold(s) t.
+
+        t may be a scalar or a column of thresholds (shape (T, 1)), in
+        which case the outputs broadcast to shape (T, N). Returns
+        (a, cost, accepted): adjustments, their cost k a^2 and the
+        lender's acceptance decisions.
+        """
+        # Keep the broadcast arithmetic in the population's float32
+        t = np.asarray(t, dtype=self.z.dtype)
+        z = self.z
+
+        # Closed form of borrower.best_response via the cached breaks,
+        # branch-free: borrowers below t adjust by t - z while t is at
+        # most their break, and are accepted if above t or adjusting
+        needs_adjust = (z < t) & (t <= self.t_adjust_break)
+        a = (t - z) * needs_adjust
+        accepted = (z >= t) | needs_adjust
+
+        return a, self.k * a * a, accepted
+
+    def _accepted_by_stratum(self, t):
+        """
+        Accepted counts at threshold(s) t for each (group id, is_good)
+        stratum, via binary search on the stratum's sorted breaks
+        instead of a pass over all borrowers.
+
+        Returns an int array of shape (2, 2) + np.shape(t), indexed as
+        [group id, is_good].
+        """
+        t = np.asarray(t, dtype=self.z.dtype)
+        acc = np.empty((2, 2) + t.shape, dtype=np.intp)
+        for (g, good), sl in self._strata.items():
+            # Accepted iff t <= break: count the breaks not below t
+            t_break = self.t_adjust_break[sl]
+            acc[g, int(good)] = t_break.size - np.searchsorted(t_break, t)
+        return acc
 
     def evaluate_threshold(self, t, lam):
         """
@@ -92,51 +243,26 @@ class StrategicLendingEnv:
         - H(t): number of good-but-denied borrowers
         - group-level acceptance rates and avg costs
         """
-        Pi = 0.0
-        H = 0
-        n_L = 0
-        n_H = 0
-        acc_L = 0
-        acc_H = 0
-        cost_L = 0.0
-        cost_H = 0.0
-
-        for borrower in self.borrowers:
-            # Borrower best response
-            a = borrower.best_response(t)
-            s = borrower.z + a  # reported score
-
-            accepted = s >= t
-            is_good = borrower.is_good
-
-            # Lender profit contribution
-            if accepted:
-                if is_good:
-                    Pi += self.pi_G
-                else:
-                    Pi += self.pi_B
-
-            # Harm: good-but-denied
-            if (not accepted) and is_good:
-                H += 1
-
-            # Group-level stats
-            if borrower.is_low_cost:
-                n_L += 1
-                if accepted:
-                    acc_L += 1
-                cost_L += borrower.adjustment_cost(a)
-            else:
-                n_H += 1
-                if accepted:
-                    acc_H += 1
-                cost_H += borrower.adjustment_cost(a)
+        is_good = self.is_good
+
+        # Borrower best response and its cost
+        _, cost, accepted = self._respond(t)
+
+        # Lender profit contribution
+        Pi = (self.pi_G * np.count_nonzero(accepted & is_good)
+              + self.pi_B * np.count_nonzero(accepted & ~is_good))
+
+        # Harm: good-but-denied
+        H = np.count_nonzero(~accepted & is_good)
+
+        # Group-level stats, indexed by group id (0 = high, 1 = low)
+        acc = np.bincount(self.group, weights=accepted, minlength=2)
+        cost = np.bincount(self.group, weights=cost, minlength=2)
 
         # Avoid divide-by-zero if a group is empty
-        acc_L_rate = acc_L / n_L if n_L > 0 else 0.0
-        acc_H_rate = acc_H / n_H if n_H > 0 else 0.0
-        avg_cost_L = cost_L / n_L if n_L > 0 else 0.0
-        avg_cost_H = cost_H / n_H if n_H > 0 else 0.0
+        n = self.group_n
+        acc_rate = np.divide(acc, n, out=np.zeros(2), where=n > 0)
+        avg_cost = np.divide(cost, n, out=np.zeros(2), where=n > 0)
 
         # Objective for the lender under regulation λ
         objective = Pi - lam * H
@@ -144,41 +270,249 @@ class StrategicLendingEnv:
         stats = {
             "Pi": Pi,
             "H": H,
-            "acc_L": acc_L_rate,
-            "acc_H": acc_H_rate,
-            "avg_cost_L": avg_cost_L,
-            "avg_cost_H": avg_cost_H,
+            "acc_L": acc_rate[1],
+            "acc_H": acc_rate[0],
+            "avg_cost_L": avg_cost[1],
+            "avg_cost_H": avg_cost[0],
         }
         return objective, stats
 
-    def sweep_lambda(self, lambda_grid, t_grid):
+    def stats_at(self, t):
+        """
+        Threshold statistics at t (scalar or array) from the sorted
+        population and prefix-sum tables, without a pass over all
+        borrowers: O(log N) per threshold.
+
+        Counts come from _accepted_by_stratum. For costs, the borrowers
+        adjusting at t are those with z < t (a prefix of their group's
+        slice) minus those with t_adjust_break < t (a prefix of each
+        stratum's slice), so sum (t - z)^2 = n t^2 - 2 t sum z + sum z^2
+        follows from the tables.
+
+        Returns a dict with the same keys as precompute_threshold_curves.
+        """
+        t = np.asarray(t, dtype=self.z.dtype)
+        t64 = t.astype(np.float64)
+        cum_z, cum_z2 = self._cum_z, self._cum_z2
+
+        acc = self._accepted_by_stratum(t)
+        cost = np.empty((2,) + t.shape)
+
+        bounds = (0, self.n_H, self.N)
+        for g, k_g in ((0, self.k_H), (1, self.k_L)):
+            lo, hi = bounds[g], bounds[g + 1]
+
+            # Borrowers below the threshold: z < t
+            j = lo + np.searchsorted(self.z[lo:hi], t)
+            n = j - lo
+            S = cum_z[j] - cum_z[lo]
+            Q = cum_z2[j] - cum_z2[lo]
+
+            # ... minus those past their break, who do not adjust
+            for good in (False, True):
+                sl = self._strata[g, good]
+                m = sl.stop - acc[g, int(good)]
+                n = n - (m - sl.start)
+                S = S - (cum_z[m] - cum_z[sl.start])
+                Q = Q - (cum_z2[m] - cum_z2[sl.start])
+
+            # Clip rounding residue when nobody adjusts
+            cost[g] = k_g * np.maximum(n * t64 * t64 - 2 * t64 * S + Q, 0.0)
+
+        n_acc_G = acc[0, 1] + acc[1, 1]
+        n_acc_B = acc[0, 0] + acc[1, 0]
+        H = np.count_nonzero(self.is_good) - n_acc_G
+        acc_L = acc[1, 0] + acc[1, 1]
+        acc_H = acc[0, 0] + acc[0, 1]
+
+        return self._curves_from_sums(
+            (n_acc_G, n_acc_B, H, acc_L, acc_H, cost[1], cost[0])
+        )
+
+    def _sweep_numpy(self, t_grid):
+        """
+        Pure-numpy counterpart of _kernels.sweep_kernel: broadcasts the
+        best response over a (T, N) array and reduces along the borrower
+        axis. Same return layout as the kernel.
+        """
+        is_good = self.is_good
+        is_low_cost = self.is_low_cost
+
+        _, cost, accepted = self._respond(t_grid[:, None])
+
+        n_acc_G = np.count_nonzero(accepted & is_good, axis=1)
+        n_acc_B = np.count_nonzero(accepted & ~is_good, axis=1)
+        H = np.count_nonzero(is_good) - n_acc_G
+
+        acc_L = np.count_nonzero(accepted & is_low_cost, axis=1)
+        acc_H = n_acc_G + n_acc_B - acc_L
+        cost_L = cost[:, is_low_cost].sum(axis=1, dtype=np.float64)
+        cost_H = cost[:, ~is_low_cost].sum(axis=1, dtype=np.float64)
+
+        return n_acc_G, n_acc_B, H, acc_L, acc_H, cost_L, cost_H
+
+    def _check_backend(self, backend):
+        """Resolve the default backend and check it is available."""
+        if backend is None:
+            return "tables"
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend {backend!r}; expected one of {BACKENDS}"
+            )
+        if (backend == "numba" and not HAVE_NUMBA) or \
+                (backend == "jax" and not HAVE_JAX):
+            raise ImportError(f"Backend {backend!r} is not installed")
+        return backend
+
+    def _jax_sweep(self, t_grid, lambda_grid):
+        """Run _kernels.jax_sweep; returns numpy (t_idx, sums)."""
+        jax_sweep = load_jax_sweep()
+        t_idx, sums = jax_sweep(
+            self.z, self.k, self.t_adjust_break, self.is_low_cost,
+            self.is_good, t_grid, np.asarray(lambda_grid, dtype=np.float32),
+            self.pi_G, self.pi_B,
+        )
+        return np.asarray(t_idx), tuple(np.asarray(x) for x in sums)
+
+    def precompute_threshold_curves(self, t_grid, backend=None):
+        """
+        Evaluate every threshold in t_grid at once. None of these
+        quantities depend on λ, so a whole λ-sweep can reuse them.
+
+        backend selects how the thresholds are evaluated:
+        - "tables" (default): stats_at, O(log N) per threshold
+        - "numpy", "numba", "jax": direct (T, N) evaluation over all
+          borrowers, as a broadcast, compiled kernel or jitted program
+
+        Returns a dict of arrays of shape (len(t_grid),):
+        - n_acc_G, n_acc_B: accepted good / bad borrowers
+        - Pi, H: total profit and good-but-denied count
+        - acc_L, acc_H, avg_cost_L, avg_cost_H: group-level stats
+        """
+        backend = self._check_backend(backend)
+        t_grid = np.asarray(t_grid, dtype=self.z.dtype)
+
+        if backend == "tables":
+            return self.stats_at(t_grid)
+        if backend == "numba":
+            sweep_kernel = load_sweep_kernel()
+            sums = sweep_kernel(self.z, self.k, self.t_adjust_break,
+                                self.is_low_cost, self.is_good, t_grid)
+        elif backend == "jax":
+            _, sums = self._jax_sweep(t_grid, [])
+        else:
+            sums = self._sweep_numpy(t_grid)
+        return self._curves_from_sums(sums)
+
+    def _curves_from_sums(self, sums):
+        """
+        Turn per-threshold sums (sweep_kernel layout) into the curves
+        returned by precompute_threshold_curves.
+        """
+        n_acc_G, n_acc_B, H, acc_L, acc_H, cost_L, cost_H = sums
+
+        # Avoid divide-by-zero if a group is empty
+        n_L = self.n_L if self.n_L > 0 else np.inf
+        n_H = self.n_H if self.n_H > 0 else np.inf
+
+        return {
+            "n_acc_G": n_acc_G,
+            "n_acc_B": n_acc_B,
+            "Pi": self.pi_G * n_acc_G + self.pi_B * n_acc_B,
+            "H": H,
+            "acc_L": acc_L / n_L,
+            "acc_H": acc_H / n_H,
+            "avg_cost_L": cost_L / n_L,
+            "avg_cost_H": cost_H / n_H,
+        }
+
+    def sweep_lambda(self, lambda_grid, t_grid, backend=None):
         """
         For each λ in lambda_grid, find the threshold t(λ) in t_grid
         that maximizes Π(t) - λ H(t), and return summary results.
-        """
-        results = []
 
-        for lam in lambda_grid:
-            best_obj = -np.inf
-            best_t = None
-            best_stats = None
+        backend is as in precompute_threshold_curves; with "jax" the
+        λ-argmax runs inside the jitted program as well.
+        """
+        backend = self._check_backend(backend)
+        lambda_grid = np.asarray(lambda_grid, dtype=float)
 
-            for t in t_grid:
-                obj, stats = self.evaluate_threshold(t, lam)
-                if obj > best_obj:
-                    best_obj = obj
-                    best_t = t
-                    best_stats = stats
+        if backend == "jax":
+            t_idx, sums = self._jax_sweep(
+                np.asarray(t_grid, dtype=self.z.dtype), lambda_grid
+            )
+            curves = self._curves_from_sums(sums)
+        else:
+            curves = self.precompute_threshold_curves(t_grid, backend)
+            t_idx = _best_threshold_indices(
+                curves["Pi"], curves["H"], lambda_grid
+            )
+        Pi, H = curves["Pi"], curves["H"]
 
+        results = []
+        for lam, i in zip(lambda_grid, t_idx):
             results.append({
                 "lambda": lam,
-                "t_star": best_t,
-                "Pi": best_stats["Pi"],
-                "H": best_stats["H"],
-                "acc_L": best_stats["acc_L"],
-                "acc_H": best_stats["acc_H"],
-                "avg_cost_L": best_stats["avg_cost_L"],
-                "avg_cost_H": best_stats["avg_cost_H"],
+                "t_star": t_grid[i],
+                "Pi": Pi[i],
+                "H": int(H[i]),
+                "acc_L": curves["acc_L"][i],
+                "acc_H": curves["acc_H"][i],
+                "avg_cost_L": curves["avg_cost_L"][i],
+                "avg_cost_H": curves["avg_cost_H"][i],
             })
 
-        return results
\ No newline at end of file
+        return results
+
+    def critical_thresholds(self, t_min, t_max):
+        """
+        Sorted candidate thresholds in [t_min, t_max] that contain an
+        optimum of Π(t) - λ H(t) for every λ.
+
+        Π and H are step functions that only change at the borrowers'
+        break points: a borrower is accepted iff t <= t_adjust_break, so
+        each piece (prev_break, break] is constant and attains its value
+        at the break itself. The candidates are t_min, the breaks inside
+        the range and t_max. Can be passed to sweep_lambda as t_grid.
+        """
+        t_break = self.t_adjust_break
+        inner = np.unique(t_break[(t_break > t_min) & (t_break < t_max)])
+        return np.concatenate(([t_min], inner, [t_max]))
+
+    def sweep_lambda_exact(self, lambda_grid, t_min, t_max):
+        """
+        Exact version of sweep_lambda over the continuous range
+        [t_min, t_max], without a threshold grid.
+
+        This is sweep_lambda over the candidates from
+        critical_thresholds, evaluated with the prefix-sum tables.
+        t* is the lowest optimal candidate.
+        """
+        candidates = self.critical_thresholds(t_min, t_max)
+        return self.sweep_lambda(lambda_grid, candidates, backend="tables")
+
+
+def _best_threshold_indices(Pi, H, lambda_grid):
+    """
+    Index of the threshold maximizing Π - λ H for each λ in lambda_grid.
+    Pi and H are per-threshold arrays; ties keep the first (lowest) t.
+
+    When H is nondecreasing along the thresholds (true for a sorted
+    t-grid, since acceptance is monotone in t), the first maximizer can
+    only move to lower indices as λ grows. The λ values are then visited
+    in increasing order and each search stops at the previous optimum.
+    """
+    lambda_grid = np.asarray(lambda_grid, dtype=float)
+    t_idx = np.empty(len(lambda_grid), dtype=np.intp)
+
+    # Without monotone H the window argument fails: search everything
+    monotone = np.all(np.diff(H) >= 0)
+
+    hi = len(Pi)
+    for j in np.argsort(lambda_grid, kind="stable"):
+        obj = Pi[:hi] - lambda_grid[j] * H[:hi]
+        t_idx[j] = obj.argmax()
+        if monotone:
+            hi = t_idx[j] + 1
+
+    return t_idx
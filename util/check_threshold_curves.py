@@ -0,0 +1,160 @@
+import numpy as np
+from env.environment import StrategicLendingEnv, _best_threshold_indices
+from env._kernels import HAVE_JAX, HAVE_NUMBA
+
+
+KEYS = ("Pi", "H", "acc_L", "acc_H", "avg_cost_L", "avg_cost_H")
+
+
+def check(ok, message):
+    """Raise AssertionError unless ok (unlike assert, also under python -O)."""
+    if not ok:
+        raise AssertionError(message)
+
+
+def check_close(a, b, message, rtol=1e-5, atol=1e-6):
+    check(np.allclose(a, b, rtol=rtol, atol=atol), message)
+
+
+def reference_curves(env, t_grid):
+    """
+    Threshold statistics from a plain loop over the Borrower views, one
+    best response per borrower and threshold. Independent of the
+    precomputed t_adjust_break the vectorized paths share.
+    """
+    borrowers = [env[i] for i in range(len(env))]
+    curves = {key: np.zeros(len(t_grid)) for key in KEYS}
+
+    for j, t in enumerate(t_grid):
+        t = float(t)
+        acc_G = acc_B = H = 0
+        acc = [0, 0]
+        cost = [0.0, 0.0]
+        for borrower in borrowers:
+            a, c = borrower.best_response_and_cost(t)
+            accepted = borrower.z >= t or a > 0
+            if accepted:
+                if borrower.is_good:
+                    acc_G += 1
+                else:
+                    acc_B += 1
+            elif borrower.is_good:
+                H += 1
+            g = int(borrower.is_low_cost)
+            acc[g] += accepted
+            cost[g] += c
+
+        n = (env.n_H, env.n_L)
+        curves["Pi"][j] = env.pi_G * acc_G + env.pi_B * acc_B
+        curves["H"][j] = H
+        curves["acc_H"][j], curves["acc_L"][j] = (
+            acc[g] / n[g] if n[g] else 0.0 for g in (0, 1)
+        )
+        curves["avg_cost_H"][j], curves["avg_cost_L"][j] = (
+            cost[g] / n[g] if n[g] else 0.0 for g in (0, 1)
+        )
+
+    return curves
+
+
+def check_env(env, t_grid, label):
+    """
+    Compare the default "tables" threshold curves with the other
+    backends, evaluate_threshold and a per-borrower reference loop, and
+    the λ-sweeps with brute-force argmaxes.
+    """
+    t_grid = np.asarray(t_grid, dtype=env.z.dtype)
+    tables = env.precompute_threshold_curves(t_grid, backend="tables")
+
+    # Other backends
+    backends = ["numpy"]
+    if HAVE_NUMBA:
+        backends.append("numba")
+    if HAVE_JAX:
+        backends.append("jax")
+    for backend in backends:
+        other = env.precompute_threshold_curves(t_grid, backend=backend)
+        # jax sums in float32 by default
+        rtol = 1e-4 if backend == "jax" else 1e-5
+        for key in KEYS + ("n_acc_G", "n_acc_B"):
+            check_close(tables[key], other[key],
+                        f"{label}: tables and {backend} disagree on {key}",
+                        rtol=rtol)
+
+    for i, t in enumerate(t_grid):
+        _, stats = env.evaluate_threshold(t, 0.0)
+        for key in KEYS:
+            check_close(tables[key][i], stats[key],
+                        f"{label}: tables and evaluate_threshold disagree "
+                        f"on {key} at t={t}")
+
+    # Independent reference on every fifth threshold
+    sub = slice(None, None, 5)
+    reference = reference_curves(env, t_grid[sub])
+    for key in KEYS:
+        check_close(tables[key][sub], reference[key],
+                    f"{label}: tables and the per-borrower loop disagree "
+                    f"on {key}")
+
+    # λ-window shortcut against a plain (Λ, T) argmax; unsorted λ
+    lambda_grid = np.random.default_rng(0).permutation(
+        np.linspace(0.0, 2.0, 41)
+    )
+    Pi, H = tables["Pi"], tables["H"]
+    plain = np.argmax(Pi[None, :] - lambda_grid[:, None] * H[None, :], axis=1)
+    check(np.array_equal(_best_threshold_indices(Pi, H, lambda_grid), plain),
+          f"{label}: _best_threshold_indices differs from the plain argmax")
+
+    # Exact sweep: never worse than a dense grid over the same range, and
+    # its reported Π, H are attained at its t*
+    t_min, t_max = float(t_grid[0]), float(t_grid[-1])
+    exact = env.sweep_lambda_exact(lambda_grid, t_min, t_max)
+    dense = env.sweep_lambda(lambda_grid, np.linspace(t_min, t_max, 5_001))
+    for e, d in zip(exact, dense):
+        lam = e["lambda"]
+        check(e["Pi"] - lam * e["H"] >= d["Pi"] - lam * d["H"] - 1e-6,
+              f"{label}: sweep_lambda_exact is beaten by a dense grid "
+              f"at λ={lam}")
+        _, stats = env.evaluate_threshold(e["t_star"], lam)
+        check_close((e["Pi"], e["H"]), (stats["Pi"], stats["H"]),
+                    f"{label}: sweep_lambda_exact misreports t*={e['t_star']}")
+
+    # jax runs the λ-argmax in float32, so exact ties may resolve to a
+    # different t*: compare the optimal objective instead
+    if HAVE_JAX:
+        for j, r in zip(
+            env.sweep_lambda(lambda_grid, t_grid, backend="jax"),
+            env.sweep_lambda(lambda_grid, t_grid, backend="tables"),
+        ):
+            lam = r["lambda"]
+            check_close(j["Pi"] - lam * j["H"], r["Pi"] - lam * r["H"],
+                        f"{label}: jax and tables sweeps disagree at λ={lam}",
+                        atol=1e-4)
+
+    print(f"ok  {label}")
+
+
+def main():
+    t_grid = np.linspace(-2.0, 3.0, 101)
+
+    # Default regime and both empty-group cases
+    for p_L in (0.5, 0.0, 1.0):
+        env = StrategicLendingEnv(N=2_000, p_L=p_L, seed=1)
+        check_env(env, t_grid, f"p_L={p_L}")
+
+    # theta between two float32 values, just above one borrower's z, so
+    # every good/bad split has to use the same float32 comparison
+    env = StrategicLendingEnv(N=2_000, seed=1)
+    env.set_params(theta=float(env.z[1_000]) + 1e-12)
+    check_env(env, t_grid, "theta not representable in float32")
+
+    env.set_params(theta=0.1)
+    check_env(env, t_grid, "theta=0.1")
+
+    # Free adjustment (k_L = 0) with b = U_no for bad borrowers
+    env = StrategicLendingEnv(N=2_000, k_L=0.0, b=0.0, seed=1)
+    check_env(env, t_grid, "k_L=0, b=0")
+
+
+if __name__ == "__main__":
+    main()
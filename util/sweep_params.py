@@ -1,27 +1,122 @@
+import inspect
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
 from ..env.environment import StrategicLendingEnv
 
 
+# Environments keyed by the parameters that determine the random draws
+_ENV_CACHE = {}
+_DRAW_PARAMS = ("seed", "N", "p_L", "z_mean", "z_std")
+
+# Constructor defaults, used to fill in parameters a call leaves out
+_ENV_DEFAULTS = {
+    name: p.default
+    for name, p in inspect.signature(StrategicLendingEnv.__init__).parameters.items()
+    if name != "self"
+}
+
+
+def get_env(params):
+    """
+    Return an environment for the given parameter dict, reusing the
+    population drawn for an earlier call with the same draw parameters
+    (seed, N, p_L, z_mean, z_std) and only updating the rest.
+
+    Missing parameters take the StrategicLendingEnv defaults, not the
+    values left on a cached environment by an earlier call. With
+    seed=None every call draws a fresh population and nothing is cached.
+    """
+    unknown = set(params) - set(_ENV_DEFAULTS)
+    if unknown:
+        raise TypeError(
+            f"Unknown environment parameters: {', '.join(sorted(unknown))}"
+        )
+    params = {**_ENV_DEFAULTS, **params}
+    if params["seed"] is None:
+        return StrategicLendingEnv(**params)
+
+    key = tuple(params[name] for name in _DRAW_PARAMS)
+    env = _ENV_CACHE.get(key)
+    if env is None:
+        env = StrategicLendingEnv(**params)
+        _ENV_CACHE[key] = env
+    else:
+        env.set_params(**{
+            name: value for name, value in params.items()
+            if name not in _DRAW_PARAMS
+        })
+    return env
+
+
+def unregulated_optimum(curves, t_grid, pi_G, pi_B):
+    """
+    Profit-maximizing threshold t* at λ = 0 from precomputed threshold
+    curves. Profits enter only through Π(t) = π_G accG(t) + π_B accB(t),
+    so one set of curves serves every (pi_G, pi_B). Returns (t_star, stats).
+    """
+    Pi = pi_G * curves["n_acc_G"] + pi_B * curves["n_acc_B"]
+    i = int(np.argmax(Pi))
+
+    best_t = t_grid[i]
+    best_stats = {
+        "Pi": Pi[i],
+        "H": int(curves["H"][i]),
+        "acc_L": curves["acc_L"][i],
+        "acc_H": curves["acc_H"][i],
+        "avg_cost_L": curves["avg_cost_L"][i],
+        "avg_cost_H": curves["avg_cost_H"][i],
+    }
+
+    return best_t, best_stats
+
+
 def find_unregulated_optimum(params, t_grid):
     """
     For a given parameter dict, create an environment, and find
     the profit-maximizing threshold t* at λ = 0. Returns (t_star, stats).
     """
-    env = StrategicLendingEnv(**params)
-    best_obj = -np.inf
-    best_t = None
-    best_stats = None
-
-    lam = 0.0  # unregulated
+    env = get_env(params)
+    curves = env.precompute_threshold_curves(t_grid)
+    return unregulated_optimum(curves, t_grid, env.pi_G, env.pi_B)
 
-    for t in t_grid:
-        obj, stats = env.evaluate_threshold(t, lam)
-        if obj > best_obj:
-            best_obj = obj
-            best_t = t
-            best_stats = stats
 
-    return best_t, best_stats
+def sweep_regime(params, t_grid, pi_G_grid, pi_B_grid):
+    """
+    Unregulated optima for one behavioural regime (a params dict without
+    lender profits) and every (pi_G, pi_B) in the profit grids. Threshold
+    curves are computed once and shared, since profits only rescale Π(t).
+    Returns one result row per profit combination.
+    """
+    env = get_env(params)
+    curves = env.precompute_threshold_curves(t_grid)
+
+    rows = []
+    for pi_G, pi_B in itertools.product(pi_G_grid, pi_B_grid):
+        t_star, stats = unregulated_optimum(curves, t_grid, pi_G, pi_B)
+
+        H = stats["H"]
+        rows.append({
+            "p_L": params["p_L"],
+            "b": params["b"],
+            "h": params["h"],
+            "k_L": params["k_L"],
+            "k_H": params["k_H"],
+            "pi_G": pi_G,
+            "pi_B": pi_B,
+            "t_star": t_star,
+            "Pi": stats["Pi"],
+            "H": H,
+            "H_frac": H / params["N"],
+            "acc_L": stats["acc_L"],
+            "acc_H": stats["acc_H"],
+            "cost_L": stats["avg_cost_L"],
+            "cost_H": stats["avg_cost_H"],
+        })
+    return rows
 
 
 def main():
@@ -41,57 +136,36 @@ def main():
     pi_G_grid  = [0.2]                # profit on good borrowers
     pi_B_grid  = [-0.2, -0.4, -0.6]   # profit on bad borrowers (negative)
 
-    results = []
-
-    # Simple nested loops over the grid
-    for p_L in p_L_grid:
-        for b in b_grid:
-            for h in h_grid:
-                for k_L in k_L_grid:
-                    for k_H in k_H_grid:
-                        for pi_G in pi_G_grid:
-                            for pi_B in pi_B_grid:
-                                params = dict(
-                                    N=N,
-                                    p_L=p_L,
-                                    theta=theta,
-                                    b=b,
-                                    h=h,
-                                    k_L=k_L,
-                                    k_H=k_H,
-                                    pi_G=pi_G,
-                                    pi_B=pi_B,
-                                    z_mean=z_mean,
-                                    z_std=z_std,
-                                    seed=0,     # fixed seed for comparability
-                                )
-
-                                t_star, stats = find_unregulated_optimum(params, t_grid)
-
-                                H = stats["H"]
-                                Pi = stats["Pi"]
-                                acc_L = stats["acc_L"]
-                                acc_H = stats["acc_H"]
-                                cost_L = stats["avg_cost_L"]
-                                cost_H = stats["avg_cost_H"]
-
-                                results.append({
-                                    "p_L": p_L,
-                                    "b": b,
-                                    "h": h,
-                                    "k_L": k_L,
-                                    "k_H": k_H,
-                                    "pi_G": pi_G,
-                                    "pi_B": pi_B,
-                                    "t_star": t_star,
-                                    "Pi": Pi,
-                                    "H": H,
-                                    "H_frac": H / N,
-                                    "acc_L": acc_L,
-                                    "acc_H": acc_H,
-                                    "cost_L": cost_L,
-                                    "cost_H": cost_H,
-                                })
+    # Behavioural regimes: parameters that change borrower responses.
+    # Lender profits are handled inside each regime.
+    regimes = [
+        dict(
+            N=N,
+            p_L=p_L,
+            theta=theta,
+            b=b,
+            h=h,
+            k_L=k_L,
+            k_H=k_H,
+            z_mean=z_mean,
+            z_std=z_std,
+            seed=0,     # fixed seed for comparability
+        )
+        for p_L, b, h, k_L, k_H in itertools.product(
+            p_L_grid, b_grid, h_grid, k_L_grid, k_H_grid
+        )
+    ]
+
+    # Regimes are independent: run them in parallel worker processes
+    one_regime = partial(
+        sweep_regime, t_grid=t_grid, pi_G_grid=pi_G_grid, pi_B_grid=pi_B_grid
+    )
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        results = [
+            row
+            for rows in ex.map(one_regime, regimes, chunksize=4)
+            for row in rows
+        ]
 
     # Sort by harm fraction (descending)
     results_sorted = sorted(results, key=lambda r: r["H_frac"], reverse=True)